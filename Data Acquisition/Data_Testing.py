@@ -1,9 +1,32 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from log_index import read_range
+from log_rollup import query
 
-# visualize the data from the CSV file
-def visualize_data(filename='sensor_data.csv'):
-    data = pd.read_csv(filename)
+# Load only the rows in [start, end) through the sidecar time index
+def load_time_range(filename, start=None, end=None):
+    header, rows = read_range(filename, start, end)
+    data = pd.DataFrame(rows, columns=header)
+    # Rows come back as text; convert every column except the timestamp to numbers
+    for column in data.columns[1:]:
+        data[column] = pd.to_numeric(data[column], errors='coerce')
+    return data
+
+# Load [start, end) from the coarsest rollup whose buckets are at most `resolution` seconds wide
+def load_rollup(filename, start=None, end=None, resolution=3600):
+    header, rows, interval = query(filename, start, end, resolution)
+    data = pd.DataFrame(rows, columns=header)
+    for column in data.columns[1:]:
+        data[column] = pd.to_numeric(data[column], errors='coerce')
+    print(f"Loaded {len(data)} rows at {interval or 'raw'} s resolution")
+    return data
+
+# visualize the data from the CSV file, optionally restricted to [start, end)
+def visualize_data(filename='sensor_data.csv', start=None, end=None):
+    if start is None and end is None:
+        data = pd.read_csv(filename)
+    else:
+        data = load_time_range(filename, start, end)
     print("Data Head:")
     print(data.head())  # Show the first few rows of data for validation
 
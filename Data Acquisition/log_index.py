@@ -0,0 +1,300 @@
+import os
+import csv
+import mmap
+import zlib
+import bisect
+from datetime import datetime
+import pytz
+
+'''
+ Sparse time index over CSV logs.
+
+Looking at one afternoon used to mean parsing every row since logging began. A sidecar file
+`<log>.idx` maps every Nth row's timestamp to the byte offset where that row starts, so a
+[start, end) query only has to parse the rows inside the window (plus at most N before it).
+
+The index is built incrementally while rows are written (TimeIndexWriter), or backfilled for
+existing logs (build_index / `python log_index.py <log.csv> ...`). Logs must be appended in
+timestamp order, which every logger in this repo does.
+
+The index's first line records the log's size, mtime and header CRC as of the last write.
+Readers compare that with the log on disk: rows appended since are indexed incrementally,
+and a log that was rewritten (e.g. sensor_data.csv, saved afresh on every run) gets its index
+rebuilt instead of trusting stale offsets.
+'''
+
+DEFAULT_EVERY = 100  # Index one row out of every N
+INDEX_SUFFIX = '.idx'
+STATE_MARKER = 'Log State'  # First field of an index's fixed-width state line
+STATE_WIDTH = 128
+UNKNOWN_STATE = (-1, -1, -1)  # (size, mtime_ns, header CRC) not recorded, e.g. writer still open
+
+# Timestamp formats written by the loggers in this repo
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",  # Unified Pipeline
+    "%I:%M %p %B %d, %Y",  # gantry_simulation, e.g. '8:38 AM October 25, 2024 (CDT)'
+]
+
+# Timezone suffixes written by the loggers -> (zone, is_dst); timestamps without one are host-local
+TIMEZONE_ABBREVIATIONS = {
+    'CDT': ('America/Chicago', True),
+    'CST': ('America/Chicago', False),
+}
+
+
+def parse_timestamp(value):
+    """Convert a logged timestamp (epoch seconds or one of TIMESTAMP_FORMATS) to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = value.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    # A trailing abbreviation such as '(CDT)' names the zone the wall-clock time is in
+    zone = None
+    if text.endswith(')') and '(' in text:
+        abbreviation = text[text.rindex('(') + 1:-1].strip()
+        if abbreviation not in TIMEZONE_ABBREVIATIONS:
+            raise ValueError(f"Unknown timezone in timestamp: {value!r}")
+        zone = TIMEZONE_ABBREVIATIONS[abbreviation]
+        text = text[:text.rindex('(')].strip()
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            naive = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if zone is None:
+            return naive.timestamp()
+        # is_dst resolves the repeated hour when clocks fall back
+        return pytz.timezone(zone[0]).localize(naive, is_dst=zone[1]).timestamp()
+    raise ValueError(f"Unrecognized timestamp: {value!r}")
+
+
+def index_path(log_path):
+    """Path of the sidecar index for `log_path`."""
+    return log_path + INDEX_SUFFIX
+
+
+def log_state(path):
+    """(size, mtime_ns, CRC32 of the header line) identifying one version of a log file."""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        stat = os.fstat(f.fileno())
+    return stat.st_size, stat.st_mtime_ns, zlib.crc32(header)
+
+
+def _state_line(log, rows, source):
+    """Fixed-width first line of an index, so it can be rewritten in place."""
+    line = ','.join(str(value) for value in [STATE_MARKER, *log, rows, *source])
+    return line.ljust(STATE_WIDTH - 1) + '\n'
+
+
+def read_index_state(log_path):
+    """Return (log_state, rows, source_state) recorded in a log's index, or None.
+
+    log_state is UNKNOWN_STATE while a writer still has the index open. None means the index
+    is missing or predates state tracking.
+    """
+    try:
+        with open(index_path(log_path), newline='') as f:
+            first = next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+    if not first or first[0] != STATE_MARKER or len(first) != 8:
+        return None
+    try:
+        values = [int(value) for value in first[1:]]
+    except ValueError:
+        return None
+    return tuple(values[0:3]), values[3], tuple(values[4:7])
+
+
+def load_index(log_path):
+    """Return (timestamps, offsets) lists from a log's sidecar index."""
+    timestamps, offsets = [], []
+    with open(index_path(log_path), newline='') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first and first[0] == STATE_MARKER:
+            next(reader, None)  # Header
+        for row in reader:
+            timestamps.append(float(row[0]))
+            offsets.append(int(row[1]))
+    return timestamps, offsets
+
+
+class TimeIndexWriter:
+    """Maintain a log's sidecar index while rows are appended to it.
+
+    Call note_row(timestamp, offset) with the byte offset of each row before writing it
+    (file.tell() on the log, flushed, just before writer.writerow()), and close() once the
+    log's rows are flushed: close() records the log's size, mtime and header so readers can
+    tell whether the log changed since. `source_path` (e.g. the raw log behind a rollup) is
+    recorded the same way.
+    """
+
+    def __init__(self, log_path, every=DEFAULT_EVERY, source_path=None, resume=None):
+        self.log_path = log_path
+        self.source_path = source_path
+        self.every = every
+        if resume is None:
+            self._rows = 0
+            self._source = UNKNOWN_STATE
+            self._file = open(index_path(log_path), mode='w', newline='', buffering=1)
+            self._file.write(_state_line(UNKNOWN_STATE, 0, UNKNOWN_STATE))
+            csv.writer(self._file).writerow(["Timestamp", "Offset"])
+        else:
+            # Extend an existing index: resume = (rows indexed so far, recorded source state)
+            self._rows, self._source = resume
+            self._file = open(index_path(log_path), mode='r+', newline='', buffering=1)
+            self._file.write(_state_line(UNKNOWN_STATE, self._rows, self._source))
+            self._file.seek(0, os.SEEK_END)
+        self._writer = csv.writer(self._file)
+
+    def note_row(self, timestamp, offset):
+        """Record the row about to be written at byte `offset`; every Nth one is indexed."""
+        if self._rows % self.every == 0:
+            self._writer.writerow([parse_timestamp(timestamp), offset])
+        self._rows += 1
+
+    def close(self):
+        """Record the state of the log (and source) the index now covers, and close it."""
+        source = self._source if self.source_path is None else log_state(self.source_path)
+        self._file.seek(0)
+        self._file.write(_state_line(log_state(self.log_path), self._rows, source))
+        self._file.close()
+
+
+def _index_rows(log_path, indexer, offset=None):
+    """Note every row of the log from byte `offset` (default: after the header). Returns the count."""
+    rows = 0
+    with open(log_path, 'rb') as f:
+        if offset is None:
+            f.readline()  # Header
+        else:
+            f.seek(offset)
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            timestamp = next(csv.reader([line.decode('utf-8')]))[0]
+            indexer.note_row(timestamp, offset)
+            rows += 1
+    return rows
+
+
+def build_index(log_path, every=DEFAULT_EVERY):
+    """Backfill the sidecar index for an existing log. Returns the number of rows indexed."""
+    indexer = TimeIndexWriter(log_path, every)
+    rows = _index_rows(log_path, indexer)
+    indexer.close()
+    return rows
+
+
+def _entries_match(log_path, timestamps, offsets):
+    """Spot-check that the first and last indexed offsets still land on their rows."""
+    if not offsets:
+        return True
+    with open(log_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        # Entries past the end belong to rows a live writer has not flushed yet
+        written = [i for i in (0, len(offsets) - 1) if 0 < offsets[i] < size]
+        for i in written:
+            f.seek(offsets[i] - 1)
+            if f.read(1) != b'\n':
+                return False
+            try:
+                if parse_timestamp(next(csv.reader([f.readline().decode('utf-8')]))[0]) != timestamps[i]:
+                    return False
+            except (ValueError, StopIteration, UnicodeDecodeError):
+                return False
+    return True
+
+
+def _row_boundary(log_path, offset):
+    """True if a row of the log starts at byte `offset`."""
+    if offset <= 0:
+        return False
+    with open(log_path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+def ensure_index(log_path, every=DEFAULT_EVERY):
+    """Bring the sidecar index in line with the log on disk.
+
+    A missing index is built. An index the log has only been appended to since (same header,
+    previous end still a row boundary, indexed rows unchanged) is extended over the new rows.
+    Anything else means the log was rewritten, and the index is rebuilt from scratch. An index
+    still open by a writer is trusted while its entries match the log.
+    """
+    state = read_index_state(log_path)
+    if state is not None:
+        recorded, rows, source = state
+        current = log_state(log_path)
+        size, _, header_crc = recorded
+        if recorded == current:
+            return
+        if recorded == UNKNOWN_STATE:
+            if _entries_match(log_path, *load_index(log_path)):
+                return
+        elif (current[0] > size and current[2] == header_crc and _row_boundary(log_path, size)
+              and _entries_match(log_path, *load_index(log_path))):
+            indexer = TimeIndexWriter(log_path, every, resume=(rows, source))
+            _index_rows(log_path, indexer, size)
+            indexer.close()
+            return
+    build_index(log_path, every)
+
+
+def read_range(log_path, start=None, end=None):
+    """Return (header, rows) for log rows with start <= timestamp < end.
+
+    Uses the sidecar index (built, extended or rebuilt on demand, see ensure_index()) to seek
+    straight to the window in a memory-mapped view of the log, so only the rows in the window
+    are parsed.
+    """
+    ensure_index(log_path)
+    timestamps, offsets = load_index(log_path)
+    start = None if start is None else parse_timestamp(start)
+    end = None if end is None else parse_timestamp(end)
+
+    with open(log_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8')]), [])
+        if os.fstat(f.fileno()).st_size == f.tell():
+            return header, []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            # Last indexed row strictly before `start`; equal timestamps may span index points
+            position = offsets[0] if offsets else f.tell()
+            if start is not None and offsets:
+                i = bisect.bisect_left(timestamps, start) - 1
+                if i >= 0:
+                    position = offsets[i]
+
+            rows = []
+            view.seek(position)
+            for line in iter(view.readline, b''):
+                if not line.strip():
+                    continue
+                row = next(csv.reader([line.decode('utf-8')]))
+                timestamp = parse_timestamp(row[0])
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    break
+                rows.append(row)
+    return header, rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Backfill indexes: python log_index.py sensor_log.csv image_log.csv ...
+    for path in sys.argv[1:]:
+        print(f"Indexed {build_index(path)} rows of {path}")
@@ -0,0 +1,172 @@
+import os
+import csv
+import math
+from log_index import (parse_timestamp, read_range, TimeIndexWriter, log_state, read_index_state,
+                       UNKNOWN_STATE)
+
+'''
+ Incrementally maintained downsampled rollups.
+
+Analyses nearly always want 1 min / 15 min / 1 h aggregates, and recomputing them from raw
+0.5 s rows is wasteful. RollupWriter updates a running mean/min/max/count per numeric column
+as each raw row is logged, and appends one row per closed bucket to `<log>.rollup_<N>s.csv`
+next to the raw log, with its own sidecar time index. query() then reads only the requested
+window of the coarsest rollup that satisfies a request, so dashboards over months of data
+read thousands of rows instead of millions.
+
+Each rollup's index also records the state (size, mtime, header) of the raw log it was built
+from. If the raw log has changed since, query() rebuilds the rollups before reading them.
+'''
+
+ROLLUP_INTERVALS = [60, 900, 3600]  # Seconds: 1 min, 15 min, 1 h
+STATS = ['mean', 'min', 'max', 'count']
+
+
+def rollup_path(log_path, interval):
+    """Path of the `interval`-second rollup for `log_path`."""
+    return f"{log_path}.rollup_{interval}s.csv"
+
+
+def _to_number(value):
+    """Numeric value of a logged field, or None for 'N/A', blanks and non-numeric text."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+class _Bucket:
+    """Running mean/min/max/count for every column of one time bucket."""
+
+    def __init__(self, start, columns):
+        self.start = start
+        self.sums = [0.0] * columns
+        self.mins = [None] * columns
+        self.maxs = [None] * columns
+        self.counts = [0] * columns
+
+    def add(self, values):
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            self.sums[i] += value
+            self.counts[i] += 1
+            if self.mins[i] is None or value < self.mins[i]:
+                self.mins[i] = value
+            if self.maxs[i] is None or value > self.maxs[i]:
+                self.maxs[i] = value
+
+    def row(self):
+        row = [self.start]
+        for i, count in enumerate(self.counts):
+            mean = self.sums[i] / count if count else None
+            row.extend([mean, self.mins[i], self.maxs[i], count])
+        return ['N/A' if value is None else value for value in row]
+
+
+class RollupWriter:
+    """Maintain 1 min / 15 min / 1 h rollups of a raw log as its rows are written.
+
+    `columns` are the raw log's value columns (everything after Timestamp). Call add_row()
+    with each raw row, timestamp first, and close() when logging stops to flush the open buckets.
+    """
+
+    def __init__(self, log_path, columns, intervals=ROLLUP_INTERVALS):
+        self.columns = list(columns)
+        self.intervals = list(intervals)
+        self._buckets = {interval: None for interval in self.intervals}
+        self._files = {}
+        self._writers = {}
+        self._indexes = {}
+        header = ["Bucket Start"] + [f"{column} {stat}" for column in self.columns for stat in STATS]
+        for interval in self.intervals:
+            f = open(rollup_path(log_path, interval), mode='w', newline='', buffering=1)
+            self._files[interval] = f
+            self._writers[interval] = csv.writer(f)
+            self._writers[interval].writerow(header)
+            self._indexes[interval] = TimeIndexWriter(rollup_path(log_path, interval), source_path=log_path)
+
+    def add_row(self, row):
+        """Fold one raw row (timestamp followed by the column values) into every rollup."""
+        timestamp = parse_timestamp(row[0])
+        values = [_to_number(value) for value in row[1:len(self.columns) + 1]]
+        for interval in self.intervals:
+            start = timestamp - timestamp % interval
+            bucket = self._buckets[interval]
+            if bucket is not None and bucket.start != start:
+                self._write_bucket(interval, bucket)
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[interval] = _Bucket(start, len(self.columns))
+            bucket.add(values)
+
+    def _write_bucket(self, interval, bucket):
+        self._indexes[interval].note_row(bucket.start, self._files[interval].tell())
+        self._writers[interval].writerow(bucket.row())
+
+    def close(self):
+        """Write the still-open buckets and close the rollup files and their indexes."""
+        for interval in self.intervals:
+            if self._buckets[interval] is not None:
+                self._write_bucket(interval, self._buckets[interval])
+                self._buckets[interval] = None
+            self._indexes[interval].close()
+            self._files[interval].close()
+
+
+def build_rollups(log_path, intervals=ROLLUP_INTERVALS):
+    """Backfill rollups for an existing raw log."""
+    with open(log_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        writer = RollupWriter(log_path, header[1:], intervals)
+        for row in reader:
+            if row:
+                writer.add_row(row)
+    writer.close()
+
+
+def rollups_current(log_path, interval):
+    """True if the `interval` rollup was built from the raw log as it is now (or is still being written)."""
+    state = read_index_state(rollup_path(log_path, interval))
+    if state is None:
+        return False
+    recorded, _, source = state
+    return recorded == UNKNOWN_STATE or source == log_state(log_path)
+
+
+def query(log_path, start=None, end=None, resolution=0):
+    """Return (header, rows, interval) for [start, end) at the coarsest suitable granularity.
+
+    `resolution` is the widest bucket (seconds) the caller can accept. The coarsest existing
+    rollup no wider than that is used; with no suitable rollup the raw rows are read through
+    the time index and `interval` is 0. Rollups built from an older version of the raw log are
+    rebuilt first. Buckets still open while logging are not visible yet.
+    """
+    start = None if start is None else parse_timestamp(start)
+    end = None if end is None else parse_timestamp(end)
+    candidates = [interval for interval in ROLLUP_INTERVALS
+                  if interval <= resolution and os.path.exists(rollup_path(log_path, interval))]
+    if not candidates:
+        header, rows = read_range(log_path, start, end)
+        return header, rows, 0
+
+    interval = max(candidates)
+    if not rollups_current(log_path, interval):
+        build_rollups(log_path)
+    # Buckets are keyed by their start, so the one containing `start` begins up to `interval` earlier
+    header, rows = read_range(rollup_path(log_path, interval),
+                              None if start is None else start - interval, end)
+    if start is not None:
+        rows = [row for row in rows if float(row[0]) + interval > start]
+    return header, rows, interval
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Backfill rollups: python log_rollup.py sensor_log.csv ...
+    for path in sys.argv[1:]:
+        build_rollups(path)
+        print(f"Rollups written for {path}")
@@ -37,20 +37,27 @@ def save_to_csv(data, filename=DATA_FILE):
     df.to_csv(filename, index=False)
     print(f"Data saved to {filename}")
 
-# Main data acquisition loop
-def acquire_sensor_data(duration=60):
-    sensor_serials = initialize_sensors()
+# Main data acquisition loop; a `source` (e.g. log_replay.SensorDataReplay) replaces the serial ports
+def acquire_sensor_data(duration=60, source=None, filename=DATA_FILE):
+    sensor_serials = initialize_sensors() if source is None else None
     data_collection = []
     
     start_time = time.time()
-    while time.time() - start_time < duration:
-        sensor_data = read_sensor_data(sensor_serials)
+    while duration is None or time.time() - start_time < duration:
+        if source is None:
+            sensor_data = read_sensor_data(sensor_serials)
+        else:
+            sensor_data = source.read_sensor_data()
+            if sensor_data is None:  # Replayed log ended
+                break
         timestamp = time.time()
         data_collection.append([timestamp] + sensor_data)
         print(f"Data at {timestamp}: {sensor_data}")
-        time.sleep(1)  # Adjust the sampling rate 
+        if source is None:
+            time.sleep(1)  # Adjust the sampling rate; replayed rows arrive on their own timeline
     
-    save_to_csv(data_collection)
+    save_to_csv(data_collection, filename)
 
 # Run the data acquisition process for 1 minute
-acquire_sensor_data(duration=60)
+if __name__ == "__main__":
+    acquire_sensor_data(duration=60)
@@ -4,8 +4,18 @@ import busio
 import adafruit_dht
 import adafruit_bh1750  # For BH1750 light intensity sensor
 import adafruit_mlx90614  # For MLX90614 infrared temperature sensor
+import os
+import sys
 import csv
 import RPi.GPIO as GPIO
+from span_tracing import span, tracer, export_chrome_trace
+from sensor_resilience import SensorChannel, SensorArray
+from i2c_scheduler import (I2CBusScheduler, configure_bh1750, poll_period_for,
+                           MLX90614_REFRESH_TIME)
+
+# CSV time index lives with the analysis tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Acquisition'))
+from log_index import TimeIndexWriter
 
 # Initialize I2C bus
 
@@ -27,6 +37,18 @@ dht22 = adafruit_dht.DHT22(board.D4)  # GPIO pin D4 for DHT22 sensor
 bh1750 = adafruit_bh1750.BH1750(i2c)  # Light intensity sensor on I2C
 mlx90614 = adafruit_mlx90614.MLX90614(i2c)  # IR temp sensor on I2C
 
+SAMPLE_PERIOD = 1.0  # Seconds between sensor reads
+
+# The bus scheduler owns the I2C bus: it runs every transaction on one worker thread and keeps
+# the BH1750 (continuous mode, resolution matched to the sample rate) and MLX90614 polled.
+i2c_bus = I2CBusScheduler(i2c)
+bh1750_conversion_time = i2c_bus.call(configure_bh1750, bh1750, SAMPLE_PERIOD)
+i2c_bus.add_poll("bh1750", lambda: bh1750.lux, poll_period_for(SAMPLE_PERIOD, bh1750_conversion_time))
+i2c_bus.add_poll("mlx90614", lambda: (mlx90614.ambient_temperature, mlx90614.object_temperature),
+                 poll_period_for(SAMPLE_PERIOD, MLX90614_REFRESH_TIME))
+i2c_bus.wait_for("bh1750")
+i2c_bus.wait_for("mlx90614")
+
 # GPIO setup for capacitive soil moisture sensor and ultrasound sensor
 soil_moisture_pin = 17  # could replace using real GPIO pin
 
@@ -63,55 +85,98 @@ def read_ultrasound_distance():
     distance = (time_elapsed * 34300) / 2  # Speed of sound: 34300 cm/s
     return distance
 
-# Main function to read sensors
-def read_sensors():
-    try:
-        # Read temperature and humidity from DHT22
-        temperature = dht22.temperature
-        humidity = dht22.humidity
-        
-        # Read light intensity from BH1750
-        light_intensity = bh1750.lux
-        
-        # Read infrared temperature from MLX90614
-        ambient_temp = mlx90614.ambient_temperature
-        object_temp = mlx90614.object_temperature
-        
-        # Read soil moisture
-        soil_moisture = read_soil_moisture()
-        
-        # Read ultrasound distance (for pest detection)
-        distance = read_ultrasound_distance()
-        
-        # Print sensor data 
-        print(f"Temperature: {temperature:.2f}°C, Humidity: {humidity:.2f}%")
-        print(f"Light Intensity: {light_intensity:.2f} lux")
-        print(f"Ambient Temp (IR): {ambient_temp:.2f}°C, Object Temp: {object_temp:.2f}°C")
-        print(f"Soil Moisture: {'Wet' if soil_moisture == 1 else 'Dry'}")
-        print(f"Ultrasound Distance: {distance:.2f} cm")
-
-        return [temperature, humidity, light_intensity, ambient_temp, object_temp, soil_moisture, distance]
-
-    except RuntimeError as error:
-        print(f"Sensor reading error: {error}")
+# Per-sensor read functions; each one is retried on its own when it fails
+def read_dht22():
+    with span("read_dht22"):
+        return dht22.temperature, dht22.humidity
+
+# I2C sensors are polled by the bus scheduler; reads return the latest result without waiting
+def read_bh1750():
+    with span("read_bh1750"):
+        lux, measured_at = i2c_bus.latest_timestamped("bh1750", max_age=2 * SAMPLE_PERIOD)
+        return (lux,), measured_at
+
+def read_mlx90614():
+    with span("read_mlx90614"):
+        return i2c_bus.latest_timestamped("mlx90614", max_age=2 * SAMPLE_PERIOD)
+
+def read_soil_moisture_channel():
+    with span("read_soil_moisture"):
+        return (read_soil_moisture(),)
+
+def read_ultrasound_channel():
+    with span("read_ultrasound"):
+        return (read_ultrasound_distance(),)
+
+# Wrap every sensor so a failing one (usually a DHT22 checksum error) never drops the row.
+# The DHT22 needs ~2 s between reads, so its retries start slower.
+sensor_array = SensorArray([
+    SensorChannel("DHT22", read_dht22, ["Temperature", "Humidity"], initial_backoff=2.0),
+    SensorChannel("BH1750", read_bh1750, ["Light Intensity"], timestamped=True),
+    SensorChannel("MLX90614", read_mlx90614, ["Ambient Temp", "Object Temp"], timestamped=True),
+    SensorChannel("Soil Moisture", read_soil_moisture_channel, ["Soil Moisture"]),
+    SensorChannel("Ultrasound", read_ultrasound_channel, ["Ultrasound Distance"]),
+])
+
+# Format a reading for printing; stale sensors that never worked print as N/A
+def format_reading(value, spec='.2f'):
+    return 'N/A' if value is None else format(value, spec)
+
+# Main function to read sensors; `sensors` may be a replayed log (log_replay.ReplaySensorArray)
+@tracer.traced()
+def read_sensors(sensors=sensor_array):
+    reading = sensors.read()
+    if reading is None:  # Replayed log ended
         return None
+    values, ages = reading
+    temperature, humidity, light_intensity, ambient_temp, object_temp, soil_moisture, distance = values
+
+    # Print sensor data 
+    print(f"Temperature: {format_reading(temperature)}°C, Humidity: {format_reading(humidity)}%")
+    print(f"Light Intensity: {format_reading(light_intensity)} lux")
+    print(f"Ambient Temp (IR): {format_reading(ambient_temp)}°C, Object Temp: {format_reading(object_temp)}°C")
+    print(f"Soil Moisture: {'N/A' if soil_moisture is None else ('Wet' if soil_moisture == 1 else 'Dry')}")
+    print(f"Ultrasound Distance: {format_reading(distance)} cm")
+    unhealthy = [name for name, healthy in sensors.health().items() if not healthy]
+    if unhealthy:
+        print(f"Unhealthy sensors: {', '.join(unhealthy)}")
+
+    # Sensor values followed by one staleness age (seconds) per sensor
+    return values + ages
 
 # Function to log sensor data to CSV
-def log_sensor_data_to_csv(filename, duration=60):
+def log_sensor_data_to_csv(filename, duration=60, trace_filename='sensor_trace.json', sensors=sensor_array):
     start_time = time.time()
 
     with open(filename, mode='w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(["Timestamp", "Temperature", "Humidity", "Light Intensity", "Ambient Temp", "Object Temp", "Soil Moisture", "Ultrasound Distance"])
+        writer.writerow(["Timestamp"] + sensors.header())
+
+        # Sidecar time index (<csv>.idx) for fast range queries
+        index = TimeIndexWriter(filename)
         
-        while time.time() - start_time < duration:
-            sensor_data = read_sensors()
-            if sensor_data:
-                # Add timestamp to the sensor data
-                timestamp = time.time()
-                writer.writerow([timestamp] + sensor_data)
-
-            time.sleep(1)  # Read sensors every 1 second
+        while duration is None or time.time() - start_time < duration:
+            sensor_data = read_sensors(sensors)
+            if sensor_data is None:
+                break
+            # Add timestamp to the sensor data
+            timestamp = time.time()
+            file.flush()
+            index.note_row(timestamp, file.tell())
+            writer.writerow([timestamp] + sensor_data)
+
+            if sensors is sensor_array:
+                time.sleep(SAMPLE_PERIOD)  # Read sensors every sample period; replays pace themselves
+
+        file.flush()  # The index records the log's final size
+        index.close()
+
+    sensor_array.stop()
+    i2c_bus.close()
+
+    # Export spans when tracing is enabled (HZ_TRACE=1)
+    if tracer.enabled:
+        export_chrome_trace(trace_filename)
 
 # Run the sensor reading and logging function for 60 seconds
 if __name__ == "__main__":
@@ -7,13 +7,41 @@ import adafruit_mlx90614
 import RPi.GPIO as GPIO
 import picamera
 import csv
+import io
+import os
+import sys
 from datetime import datetime
+from span_tracing import span, tracer, export_chrome_trace
+from sensor_resilience import SensorChannel, SensorArray
+from image_features import ImageFeatureStage, start_feature_pool
+from frame_dedup import FrameDeduplicator
+from i2c_scheduler import (I2CBusScheduler, configure_bh1750, poll_period_for,
+                           MLX90614_REFRESH_TIME)
+
+# CSV time index lives with the analysis tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Acquisition'))
+from log_index import TimeIndexWriter
+
+# Fork the image feature workers before any hardware is opened or threads are started
+feature_pool = start_feature_pool()
 
 # Initialize I2C bus for light sensor (BH1750) and infrared temperature sensor (MLX90614)
 i2c = busio.I2C(board.SCL, board.SDA)
 bh1750 = adafruit_bh1750.BH1750(i2c)
 mlx90614 = adafruit_mlx90614.MLX90614(i2c)
 
+SAMPLE_PERIOD = 1.0  # Seconds between pipeline ticks
+
+# The bus scheduler owns the I2C bus: it runs every transaction on one worker thread and keeps
+# the BH1750 (continuous mode, resolution matched to the sample rate) and MLX90614 polled.
+i2c_bus = I2CBusScheduler(i2c)
+bh1750_conversion_time = i2c_bus.call(configure_bh1750, bh1750, SAMPLE_PERIOD)
+i2c_bus.add_poll("bh1750", lambda: bh1750.lux, poll_period_for(SAMPLE_PERIOD, bh1750_conversion_time))
+i2c_bus.add_poll("mlx90614", lambda: (mlx90614.ambient_temperature, mlx90614.object_temperature),
+                 poll_period_for(SAMPLE_PERIOD, MLX90614_REFRESH_TIME))
+i2c_bus.wait_for("bh1750")
+i2c_bus.wait_for("mlx90614")
+
 # Initialize GPIO for DHT22 (temperature/humidity), soil moisture, and ultrasound
 dht22 = adafruit_dht.DHT22(board.D4)
 soil_moisture_pin = 17
@@ -51,70 +79,123 @@ def read_ultrasound_distance():
     distance = (time_elapsed * 34300) / 2  # Speed of sound: 34300 cm/s
     return distance
 
-# Function to capture sensor data
+# Per-sensor read functions; each one is retried on its own when it fails
+def read_dht22():
+    with span("read_dht22"):
+        return dht22.temperature, dht22.humidity
+
+# I2C sensors are polled by the bus scheduler; reads return the latest result without waiting
+def read_bh1750():
+    with span("read_bh1750"):
+        lux, measured_at = i2c_bus.latest_timestamped("bh1750", max_age=2 * SAMPLE_PERIOD)
+        return (lux,), measured_at
+
+def read_mlx90614():
+    with span("read_mlx90614"):
+        return i2c_bus.latest_timestamped("mlx90614", max_age=2 * SAMPLE_PERIOD)
+
+def read_soil_moisture_channel():
+    with span("read_soil_moisture"):
+        return (read_soil_moisture(),)
+
+def read_ultrasound_channel():
+    with span("read_ultrasound"):
+        return (read_ultrasound_distance(),)
+
+# Wrap every sensor so a failing one (usually a DHT22 checksum error) never drops the row
+# or skips the image. The DHT22 needs ~2 s between reads, so its retries start slower.
+sensor_array = SensorArray([
+    SensorChannel("DHT22", read_dht22, ["Temperature", "Humidity"], initial_backoff=2.0),
+    SensorChannel("BH1750", read_bh1750, ["Light Intensity"], timestamped=True),
+    SensorChannel("MLX90614", read_mlx90614, ["Ambient Temp", "Object Temp"], timestamped=True),
+    SensorChannel("Soil Moisture", read_soil_moisture_channel, ["Soil Moisture"]),
+    SensorChannel("Ultrasound", read_ultrasound_channel, ["Ultrasound Distance"]),
+])
+
+# Function to capture sensor data: values followed by one staleness age (seconds) per sensor
+@tracer.traced()
 def capture_sensors():
-    try:
-        # Read temperature and humidity from DHT22
-        temperature = dht22.temperature
-        humidity = dht22.humidity
-
-        # Read light intensity from BH1750
-        light_intensity = bh1750.lux
-
-        # Read infrared temperature from MLX90614
-        ambient_temp = mlx90614.ambient_temperature
-        object_temp = mlx90614.object_temperature
-
-        # Read soil moisture
-        soil_moisture = read_soil_moisture()
-
-        # Read ultrasound distance for pest detection
-        distance = read_ultrasound_distance()
-
-        return [temperature, humidity, light_intensity, ambient_temp, object_temp, soil_moisture, distance]
-    
-    except RuntimeError as e:
-        print(f"Sensor read error: {e}")
-        return None
+    values, ages = sensor_array.read()
+    return values + ages
 
-# Function to log data to CSV
-def log_data_to_csv(filename, data):
+# Function to log data to CSV, noting the row's byte offset in the time index
+@tracer.traced()
+def log_data_to_csv(filename, data, index=None):
     with open(filename, mode='a', newline='') as file:
+        if index is not None:
+            index.note_row(data[0], file.tell())
         writer = csv.writer(file)
         writer.writerow(data)
 
-# Function to capture image
+# Near-duplicate frames (e.g. while the gantry is parked) are not written to disk
+frame_dedup = FrameDeduplicator()
+
+# Function to capture image; returns (stored image file, suppressed frame name or None)
+@tracer.traced()
 def capture_image(image_id):
     image_filename = f'image_{image_id:04d}.jpg'
-    camera.capture(image_filename)
-    return image_filename
+    stream = io.BytesIO()
+    camera.capture(stream, format='jpeg')
+
+    stream.seek(0)
+    with span("dedup_frame"):
+        duplicate_of = frame_dedup.check(stream, image_filename)
+    if duplicate_of is not None:
+        return duplicate_of, image_filename
+
+    with open(image_filename, 'wb') as f:
+        f.write(stream.getbuffer())
+    return image_filename, None
 
 # Main function to run data pipeline and log data
-def run_data_pipeline(duration=60, csv_filename='sensor_image_log.csv'):
+def run_data_pipeline(duration=60, csv_filename='sensor_image_log.csv', trace_filename='pipeline_trace.json',
+                      features_filename='image_features.csv'):
     start_time = time.time()
     image_counter = 1
 
     # Create CSV file and write the header
     with open(csv_filename, mode='w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(["Timestamp", "Temperature", "Humidity", "Light Intensity", "Ambient Temp", "Object Temp", "Soil Moisture", "Ultrasound Distance", "Image File"])
+        writer.writerow(["Timestamp"] + sensor_array.header() + ["Image File", "Suppressed Frame"])
+
+    # Sidecar time index (<csv>.idx) for fast range queries
+    index = TimeIndexWriter(csv_filename)
+
+    # Plant-health features are extracted from each frame in a process pool
+    feature_stage = ImageFeatureStage(feature_pool, features_filename)
 
     # Run data collection for specified duration
     while time.time() - start_time < duration:
-        # Get current timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Capture sensor data
-        sensor_data = capture_sensors()
-        if sensor_data:
-            # Capture image
-            image_file = capture_image(image_counter)
+        with span("pipeline_tick"):
+            # Get current timestamp
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            # Capture sensor data; failed sensors report their last good value and its age
+            sensor_data = capture_sensors()
+
+            # Capture image; a suppressed near-duplicate is logged as a reference to the stored frame
+            image_file, suppressed_frame = capture_image(image_counter)
             image_counter += 1
+            if suppressed_frame is None:
+                feature_stage.submit(timestamp, image_file)
+                if feature_stage.pending > 1:
+                    print(f"Feature extraction behind capture: {feature_stage.pending} frames queued")
 
             # Log sensor data with timestamp and image filename
-            log_data_to_csv(csv_filename, [timestamp] + sensor_data + [image_file])
+            log_data_to_csv(csv_filename, [timestamp] + sensor_data + [image_file, suppressed_frame or ''], index)
+
+        time.sleep(SAMPLE_PERIOD)  # Collect data every sample period
+
+    index.close()
+    feature_stage.close()
+    print(f"Feature extraction backlog peaked at {feature_stage.max_pending} frames")
+    print(f"Suppressed {frame_dedup.suppressed} near-duplicate frames")
+    sensor_array.stop()
+    i2c_bus.close()
 
-        time.sleep(1)  # Collect data every second
+    # Export spans when tracing is enabled (HZ_TRACE=1)
+    if tracer.enabled:
+        export_chrome_trace(trace_filename)
 
 # Run the data pipeline for 60 seconds , could adjust
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from image_features import extract_features
+
+'''
+ Benchmark plant-health feature extraction over a folder of sample images.
+
+Usage: python benchmark_image_features.py <image folder> [capture period in seconds]
+
+Reports single-process cost per frame and process-pool throughput, and whether the pool
+keeps up with the given capture period (default: one frame per second, as in the pipeline).
+'''
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def benchmark(folder, capture_period=1.0):
+    images = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                    if name.lower().endswith(IMAGE_EXTENSIONS))
+    if not images:
+        print(f"No images found in {folder}")
+        return
+
+    # Single process: per-frame latency
+    start = time.perf_counter()
+    for path in images:
+        extract_features(path)
+    serial_time = time.perf_counter() - start
+    print(f"Serial: {len(images)} frames in {serial_time:.2f} s "
+          f"({1000 * serial_time / len(images):.1f} ms/frame)")
+
+    # Process pool: throughput across all cores
+    with ProcessPoolExecutor() as pool:
+        list(pool.map(extract_features, images[:1]))  # Warm up the workers
+        start = time.perf_counter()
+        list(pool.map(extract_features, images, chunksize=4))
+        pool_time = time.perf_counter() - start
+    throughput = len(images) / pool_time
+    print(f"Pool ({os.cpu_count()} workers): {throughput:.1f} frames/s")
+
+    required = 1.0 / capture_period
+    verdict = "keeps up with" if throughput >= required else "falls behind"
+    print(f"Feature extraction {verdict} capture at {required:.2f} frames/s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark_image_features.py <image folder> [capture period in seconds]")
+        sys.exit(1)
+    benchmark(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)
@@ -0,0 +1,60 @@
+from PIL import Image
+
+'''
+ Near-duplicate frame suppression for the camera stage.
+
+While the gantry is parked every tick captures a nearly identical image. Each frame is
+reduced to a 64-bit difference hash (dHash: a 9x8 grayscale thumbnail, one bit per horizontal
+brightness gradient) and compared with the last frame that was actually stored. Frames within
+`threshold` differing bits are suppressed and logged as references to that stored frame.
+
+Hashing decodes the JPEG in draft mode at ~1/8 scale, so it costs a few ms per frame.
+'''
+
+HASH_SIZE = 8  # 8x8 gradients -> 64-bit hash
+DEFAULT_THRESHOLD = 4  # Max differing bits for two frames to count as the same scene
+
+
+def difference_hash(image_source):
+    """64-bit dHash of an image file path or file-like object."""
+    with Image.open(image_source) as img:
+        img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # Cheap downscaled JPEG decode
+        thumbnail = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+        pixels = list(thumbnail.getdata())
+
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class FrameDeduplicator:
+    """Decide whether a new frame is a near-duplicate of the last stored frame."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.reference_file = None  # Last frame actually written to disk
+        self._reference_hash = None
+        self.suppressed = 0
+
+    def check(self, image_source, image_filename):
+        """Return the stored frame this one duplicates, or None if it should be stored.
+
+        A frame that is stored becomes the new reference under `image_filename`.
+        """
+        frame_hash = difference_hash(image_source)
+        if (self._reference_hash is not None
+                and hamming_distance(frame_hash, self._reference_hash) <= self.threshold):
+            self.suppressed += 1
+            return self.reference_file
+
+        self._reference_hash = frame_hash
+        self.reference_file = image_filename
+        return None
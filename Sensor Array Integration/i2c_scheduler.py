@@ -0,0 +1,170 @@
+import time
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+import adafruit_bh1750
+from span_tracing import span
+
+'''
+ I2C bus transaction scheduler.
+
+The BH1750 and MLX90614 share one busio.I2C bus, and every property access (bh1750.lux,
+mlx90614.ambient_temperature, ...) is a separate blocking transaction. Callers on different
+threads (the sampling loop, background retries) used to contend for the bus directly.
+
+I2CBusScheduler owns the bus: a single worker thread runs every transaction, so callers never
+hold the bus themselves. Two kinds of work are queued:
+
+- submit(): one-off transactions from any thread, run as soon as the bus is free and
+  returned through a Future.
+- add_poll(): periodic reads at a sensor's conversion rate. The latest result is cached, so
+  latest() returns immediately without touching the bus or waiting for a conversion.
+
+Sensors are put into continuous-conversion mode so each poll only reads the result register.
+Every transaction runs inside an `i2c_<name>` span, so bus waits and stalls show up on the
+i2c-bus thread in traces; the callers' read spans only cover the cache lookup.
+'''
+
+# BH1750 worst-case conversion times in seconds (datasheet), keyed by adafruit_bh1750.Resolution name
+BH1750_CONVERSION_TIME = {
+    'LOW': 0.024,   # L-Resolution Mode, 4 lx
+    'HIGH': 0.180,  # H-Resolution Mode2, 0.5 lx
+}
+
+# The MLX90614 refreshes its RAM registers continuously; this is how often polling is useful
+MLX90614_REFRESH_TIME = 0.1
+
+
+def configure_bh1750(bh1750, sample_period):
+    """Put a BH1750 in continuous mode and pick the finest resolution that keeps up.
+
+    Only LOW or HIGH is chosen: MID (1 lx) needs the same 180 ms as HIGH (0.5 lx), so it is never
+    the better trade-off. HIGH needs up to 180 ms per conversion; faster sample rates fall back to
+    the 24 ms LOW mode. CONTINUE + HIGH is the library's default, so for sample periods of 180 ms
+    or more this only re-asserts it. Returns the conversion time, from which the poll period is
+    derived.
+    """
+    resolution = 'HIGH' if sample_period >= BH1750_CONVERSION_TIME['HIGH'] else 'LOW'
+    bh1750.mode = adafruit_bh1750.Mode.CONTINUE
+    bh1750.resolution = getattr(adafruit_bh1750.Resolution, resolution)
+    print(f"BH1750 set to continuous {resolution} resolution for a {sample_period} s sample period")
+    return BH1750_CONVERSION_TIME[resolution]
+
+
+def poll_period_for(sample_period, conversion_time):
+    """Poll twice per sample so the cached value is always fresh, but never faster than a conversion."""
+    return max(conversion_time, sample_period / 2)
+
+
+class I2CBusScheduler:
+    """Serialize all transactions on one I2C bus through a single worker thread."""
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+        self._queue = []  # Heap of (due_time, priority, sequence, job)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._latest = {}  # Poll name -> (value, timestamp, error)
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="i2c-bus", daemon=True)
+        self._worker.start()
+
+    def _push(self, due_time, priority, job):
+        with self._condition:
+            heapq.heappush(self._queue, (due_time, priority, next(self._sequence), job))
+            self._condition.notify()
+
+    def _run(self):
+        """Worker loop: run the next due transaction; one-off requests go before polls."""
+        while True:
+            with self._condition:
+                while self._running:
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if not self._running:
+                    return
+                _, _, _, job = heapq.heappop(self._queue)
+            try:
+                job()
+            except Exception as error:  # A failing job must never take the bus worker down
+                print(f"I2C bus job failed: {error!r}")
+
+    def submit(self, transaction, *args):
+        """Queue a one-off transaction; returns a Future with its result."""
+        future = Future()
+        span_name = f"i2c_{getattr(transaction, '__name__', 'transaction')}"
+
+        def job():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                with span(span_name):  # Bus time shows on the i2c-bus thread in traces
+                    result = transaction(*args)
+                future.set_result(result)
+            except Exception as error:
+                future.set_exception(error)
+
+        self._push(0, 0, job)
+        return future
+
+    def call(self, transaction, *args, timeout=None):
+        """Run a transaction on the bus and wait for its result."""
+        return self.submit(transaction, *args).result(timeout)
+
+    def add_poll(self, name, transaction, period):
+        """Run `transaction` every `period` seconds and cache its latest result under `name`."""
+        span_name = f"i2c_{name}"
+
+        def job():
+            due_time = time.monotonic() + period
+            try:
+                with span(span_name):
+                    value = transaction()
+                self._latest[name] = (value, time.time(), None)
+            except Exception as error:
+                value, timestamp, _ = self._latest.get(name, (None, None, None))
+                self._latest[name] = (value, timestamp, error)
+            finally:
+                self._push(due_time, 1, job)
+
+        self._push(0, 1, job)
+
+    def latest_timestamped(self, name, max_age=None):
+        """Return (value, time it was read) for the most recent poll without touching the bus.
+
+        Raises RuntimeError if nothing has been read yet, or if the cached value is older than
+        `max_age` seconds (polls failing or no longer running).
+        """
+        value, timestamp, error = self._latest.get(name, (None, None, None))
+        if timestamp is None:
+            raise RuntimeError(f"No {name} reading yet" + (f": {error}" if error else ""))
+        if max_age is not None and time.time() - timestamp > max_age:
+            reason = f"poll failing: {error}" if error is not None else "not polled recently"
+            raise RuntimeError(f"{name} reading is {time.time() - timestamp:.1f} s old; {reason}")
+        return value, timestamp
+
+    def latest(self, name, max_age=None):
+        """Return the most recent polled value; see latest_timestamped()."""
+        return self.latest_timestamped(name, max_age)[0]
+
+    def wait_for(self, name, timeout=1.0):
+        """Block until the first poll of `name` has produced a value; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._latest.get(name, (None, None, None))[1] is None:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self):
+        """Stop the worker thread; queued transactions are dropped."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._worker.join()
@@ -0,0 +1,127 @@
+import os
+import csv
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+'''
+ Plant-health features extracted on the camera path.
+
+Captured images used to be stored raw, so every analysis had to decode every JPEG again.
+Each captured frame is now reduced to a handful of columns, keyed by its capture timestamp:
+
+- ExG (excess green, 2g - r - b on chromatic coordinates) and VARI ((G - R) / (G + R - B)),
+  averaged over the frame.
+- Canopy cover: fraction of pixels whose ExG exceeds EXG_THRESHOLD.
+- A coarse per-channel colour histogram, normalized to fractions of the frame.
+
+All maths is vectorized NumPy on a reduced-size decode (JPEG draft mode), and frames are
+processed in a process pool so extraction keeps up with capture on a Pi-class CPU.
+
+The pool is forked by start_feature_pool(), which must run before any hardware is opened or
+threads are started: forking a multithreaded process can deadlock, and spawn/forkserver
+workers would re-run the pipeline script's module-level hardware setup.
+'''
+
+ANALYSIS_SIZE = (320, 240)  # Frames are decoded at roughly this size before analysis
+EXG_THRESHOLD = 0.1  # Chromatic ExG above which a pixel counts as vegetation
+HISTOGRAM_BINS = 8  # Bins per colour channel; must divide 256
+
+FEATURE_COLUMNS = (
+    ["ExG Mean", "VARI Mean", "Canopy Cover"]
+    + [f"{channel} Hist {i}" for channel in "RGB" for i in range(HISTOGRAM_BINS)]
+)
+
+
+def load_rgb(image_path, size=ANALYSIS_SIZE):
+    """Decode an image as a uint8 RGB array, letting the JPEG decoder downscale on the fly."""
+    with Image.open(image_path) as img:
+        img.draft('RGB', size)  # Cheap DCT-domain downscaling for JPEGs
+        img = img.convert('RGB')
+        if img.width > 2 * size[0]:
+            img = img.resize(size)
+        return np.asarray(img)
+
+
+def compute_features(rgb):
+    """Vegetation indices, canopy cover and colour histogram for one uint8 RGB array."""
+    pixels = rgb.reshape(-1, 3)
+    channels = pixels.astype(np.float32)
+    r, g, b = channels[:, 0], channels[:, 1], channels[:, 2]
+
+    # Excess green on chromatic coordinates (r + g + b = 1 per pixel)
+    total = r + g + b
+    total[total == 0] = 1.0
+    exg = (2 * g - r - b) / total
+
+    # VARI is undefined where G + R - B is 0 and explodes near it; skip the former and clip
+    # per-pixel values to the index's meaningful [-1, 1] range so outliers cannot dominate the mean
+    vari_denominator = g + r - b
+    valid = np.abs(vari_denominator) > 1.0
+    vari = np.clip((g[valid] - r[valid]) / vari_denominator[valid], -1.0, 1.0)
+    vari_mean = float(vari.mean()) if valid.any() else 0.0
+
+    # Coarse histogram per channel via integer binning
+    shift = 8 - int(np.log2(HISTOGRAM_BINS))
+    histogram = []
+    for channel in range(3):
+        counts = np.bincount(pixels[:, channel] >> shift, minlength=HISTOGRAM_BINS)
+        histogram.extend((counts / len(pixels)).tolist())
+
+    return [float(exg.mean()), vari_mean, float(np.mean(exg > EXG_THRESHOLD))] + histogram
+
+
+def extract_features(image_path):
+    """Decode one image file and return its FEATURE_COLUMNS values."""
+    return compute_features(load_rgb(image_path))
+
+
+def start_feature_pool(max_workers=None):
+    """Fork the feature-extraction workers now; call before opening hardware or starting threads."""
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('fork'))
+    pool.submit(os.getpid).result()  # With fork, the first submit starts every worker
+    return pool
+
+
+class ImageFeatureStage:
+    """Extract features for captured frames in a process pool and append them to a CSV.
+
+    submit() returns immediately; rows are written as extraction finishes, keyed by the
+    capture timestamp and image file name. The stage takes ownership of `pool` (from
+    start_feature_pool()) and shuts it down on close().
+    """
+
+    def __init__(self, pool, csv_filename='image_features.csv'):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._file = open(csv_filename, mode='w', newline='', buffering=1)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["Timestamp", "Image File"] + FEATURE_COLUMNS)
+        self.pending = 0  # Frames submitted but not yet written
+        self.max_pending = 0  # Peak backlog; above 1 means extraction fell behind capture
+
+    def submit(self, timestamp, image_path):
+        """Queue one captured frame for feature extraction."""
+        with self._lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        future = self._pool.submit(extract_features, image_path)
+        future.add_done_callback(lambda done: self._write(timestamp, image_path, done))
+        return future
+
+    def _write(self, timestamp, image_path, future):
+        try:
+            features = future.result()
+        except Exception as error:  # A corrupt frame must not stop the stage
+            print(f"Feature extraction failed for {image_path}: {error}")
+            features = ['N/A'] * len(FEATURE_COLUMNS)
+        with self._lock:
+            self._writer.writerow([timestamp, image_path] + features)
+            self.pending -= 1
+
+    def close(self):
+        """Wait for queued frames to finish and close the features CSV."""
+        self._pool.shutdown(wait=True)
+        self._file.close()
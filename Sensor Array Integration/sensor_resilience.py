@@ -0,0 +1,143 @@
+import time
+import threading
+
+'''
+ Per-sensor partial-failure handling.
+
+A single failed read (usually a DHT22 checksum error) used to drop the whole row, including
+the good I2C and GPIO readings and the image. Each physical sensor is now wrapped in a
+SensorChannel that is read independently:
+
+- A successful read updates the channel's last good value.
+- A failed read hands the sensor to a background retry thread with exponential backoff,
+  while the foreground loop keeps going with the last good value and its staleness age.
+- While a retry is pending the foreground loop does not touch the sensor, so a flaky device
+  never stalls the tick. After `unhealthy_after` consecutive failures the sensor is marked
+  unhealthy (logged and exposed via SensorArray.health()) and the retry backs off up to
+  `max_backoff` until the sensor recovers.
+- A read that returns None for any field counts as a failure.
+- Channels fed from a cache (timestamped=True, e.g. I2CBusScheduler polls) report the age of
+  the underlying measurement rather than the time the cache was read.
+'''
+
+
+class SensorChannel:
+    """One sensor read independently, with background retry and a last-good-value cache."""
+
+    def __init__(self, name, read_fn, fields, unhealthy_after=5,
+                 initial_backoff=0.5, max_backoff=30.0, errors=(RuntimeError, OSError),
+                 timestamped=False):
+        self.name = name
+        self.read_fn = read_fn  # Returns a tuple with one value per field
+        self.timestamped = timestamped  # read_fn returns (values, time measured) instead
+        self.fields = fields
+        self.unhealthy_after = unhealthy_after
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.errors = errors
+
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.last_error = None
+        self._last_values = (None,) * len(fields)
+        self._last_good_time = None
+        self._lock = threading.Lock()
+        self._retry_thread = None
+        self._stop = threading.Event()
+
+    def _attempt(self):
+        """Try one read; update the cache on success. Returns True if it succeeded."""
+        try:
+            if self.timestamped:
+                values, measured_at = self.read_fn()
+            else:
+                values, measured_at = self.read_fn(), time.time()
+            values = tuple(values)
+            if any(value is None for value in values):
+                raise RuntimeError(f"{self.name} returned no data")
+        except self.errors as error:
+            with self._lock:
+                self.consecutive_failures += 1
+                self.total_failures += 1
+                self.last_error = error
+                if self.healthy and self.consecutive_failures >= self.unhealthy_after:
+                    self.healthy = False
+                    print(f"{self.name} marked unhealthy after {self.consecutive_failures} failures: {error}")
+            return False
+
+        with self._lock:
+            if not self.healthy:
+                print(f"{self.name} recovered")
+            self._last_values = values
+            self._last_good_time = measured_at
+            self.consecutive_failures = 0
+            self.healthy = True
+        return True
+
+    def _retry_loop(self):
+        """Background thread: retry with exponential backoff until a read succeeds."""
+        backoff = self.initial_backoff
+        while not self._stop.wait(backoff):
+            if self._attempt():
+                return
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _retrying(self):
+        return self._retry_thread is not None and self._retry_thread.is_alive()
+
+    def read(self):
+        """Return (values, age_seconds) without ever raising.
+
+        The foreground only reads the sensor when no background retry owns it. Otherwise the
+        last good values are returned with their age; both are None if the sensor never worked.
+        """
+        if not self._retrying():
+            if not self._attempt():
+                print(f"{self.name} read error: {self.last_error}; retrying in background")
+                self._retry_thread = threading.Thread(target=self._retry_loop,
+                                                      name=f"retry-{self.name}", daemon=True)
+                self._retry_thread.start()
+
+        with self._lock:
+            values = self._last_values
+            age = None if self._last_good_time is None else time.time() - self._last_good_time
+        return values, age
+
+    def stop(self):
+        """Stop any background retry thread."""
+        self._stop.set()
+        if self._retry_thread is not None:
+            self._retry_thread.join()
+
+
+class SensorArray:
+    """Read a group of SensorChannels into one flat row of values plus age columns."""
+
+    def __init__(self, channels):
+        self.channels = channels
+
+    def header(self):
+        """Value column names followed by one '<sensor> Age' column per channel."""
+        values = [field for channel in self.channels for field in channel.fields]
+        ages = [f"{channel.name} Age" for channel in self.channels]
+        return values + ages
+
+    def read(self):
+        """Read every channel; a failing channel never drops the others."""
+        values = []
+        ages = []
+        for channel in self.channels:
+            channel_values, age = channel.read()
+            values.extend(channel_values)
+            ages.append(None if age is None else round(age, 3))
+        return values, ages
+
+    def health(self):
+        """Map of channel name -> healthy flag."""
+        return {channel.name: channel.healthy for channel in self.channels}
+
+    def stop(self):
+        """Stop every channel's background retry."""
+        for channel in self.channels:
+            channel.stop()
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import threading
+import functools
+from array import array
+from contextlib import nullcontext
+
+'''
+ Opt-in span tracing for the acquisition loop.
+
+Aggregate timings hide individual slow ticks (e.g. one pipeline iteration that took 3 s
+because a serial read stalled). Every traced block records a span (name, start, duration,
+thread) into a ring buffer of preallocated typed arrays (span names are stored as small
+integer ids), so the buffer never grows and the oldest spans are overwritten on long runs.
+The buffer can be exported as Chrome trace JSON and opened in chrome://tracing or
+https://ui.perfetto.dev.
+
+Tracing is off by default. Enable it with the HZ_TRACE=1 environment variable or by
+calling enable_tracing(); while disabled, span() checks a flag and returns a shared no-op
+context manager.
+'''
+
+DEFAULT_CAPACITY = 65536  # Number of spans kept before the oldest are overwritten
+
+_NO_SPAN = nullcontext()  # Returned by span() while tracing is disabled
+
+
+class _Span:
+    """Context manager timing one enabled span."""
+
+    __slots__ = ('tracer', 'name', 'start_ns')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start_ns, time.perf_counter_ns())
+
+
+class SpanTracer:
+    """Record timed spans into a fixed-size ring buffer."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.enabled = False
+        self._lock = threading.Lock()
+        # Preallocated parallel arrays, one slot per span
+        self._names = array('l', [0]) * capacity  # Ids into _name_table
+        self._starts = array('q', [0]) * capacity
+        self._durations = array('q', [0]) * capacity
+        self._threads = array('Q', [0]) * capacity
+        self._name_ids = {}  # Span name -> id
+        self._name_table = []  # Id -> span name
+        self._thread_names = {}  # Thread ident -> name, kept after the thread exits
+        self._count = 0  # Total spans recorded since the last clear()
+        self._epoch = time.perf_counter_ns()
+
+    def record(self, name, start_ns, end_ns):
+        """Store one finished span, overwriting the oldest slot when full."""
+        thread_id = threading.get_ident()
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = threading.current_thread().name
+        with self._lock:
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                name_id = self._name_ids[name] = len(self._name_table)
+                self._name_table.append(name)
+            slot = self._count % self.capacity
+            self._names[slot] = name_id
+            self._starts[slot] = start_ns
+            self._durations[slot] = end_ns - start_ns
+            self._threads[slot] = thread_id
+            self._count += 1
+
+    def span(self, name):
+        """Time the enclosed block as a span called `name`."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def traced(self, name=None):
+        """Decorator form of span(); defaults to the function name."""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+        return decorator
+
+    def spans(self):
+        """Return the buffered spans, oldest first, as (name, start_ns, duration_ns, thread) tuples."""
+        with self._lock:
+            count = min(self._count, self.capacity)
+            first = self._count - count
+            return [
+                (self._name_table[self._names[i % self.capacity]], self._starts[i % self.capacity],
+                 self._durations[i % self.capacity], self._threads[i % self.capacity])
+                for i in range(first, self._count)
+            ]
+
+    def dropped(self):
+        """Number of spans overwritten because the ring buffer wrapped."""
+        return max(0, self._count - self.capacity)
+
+    def clear(self):
+        """Forget all buffered spans."""
+        with self._lock:
+            self._count = 0
+            self._epoch = time.perf_counter_ns()
+
+    def to_chrome_trace(self):
+        """Build a Chrome/Perfetto trace (JSON object format) from the buffered spans."""
+        pid = os.getpid()
+        thread_names = {}
+        events = []
+        for name, start_ns, duration_ns, thread_id in self.spans():
+            tid = thread_names.setdefault(thread_id, len(thread_names) + 1)
+            events.append({
+                "name": name,
+                "ph": "X",  # Complete event: start + duration
+                "ts": (start_ns - self._epoch) / 1000.0,  # Microseconds
+                "dur": duration_ns / 1000.0,
+                "pid": pid,
+                "tid": tid,
+            })
+        for thread_id, tid in thread_names.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": self._thread_names.get(thread_id, f"thread-{thread_id}")},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"dropped_spans": self.dropped()}}
+
+    def export_chrome_trace(self, filename):
+        """Write the buffered spans to `filename` as Chrome trace JSON."""
+        with open(filename, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+        print(f"Trace with {min(self._count, self.capacity)} spans written to {filename}")
+        return filename
+
+
+# Process-wide tracer shared by the pipeline and simulation scripts
+tracer = SpanTracer()
+tracer.enabled = os.environ.get('HZ_TRACE', '0') not in ('', '0')
+span = tracer.span
+traced = tracer.traced
+
+
+def enable_tracing(enabled=True):
+    """Turn span recording on or off for the shared tracer."""
+    tracer.enabled = enabled
+
+
+def export_chrome_trace(filename='trace.json'):
+    """Export the shared tracer's spans as Chrome trace JSON."""
+    return tracer.export_chrome_trace(filename)
@@ -1,11 +1,18 @@
+import os
+import sys
 import time
 import threading
 import random
 
+# Span tracing lives with the acquisition pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Sensor Array Integration'))
+from span_tracing import tracer, export_chrome_trace
+
 # Global variables for gantry position and termination flag
 gantry_position = 0  # Current gantry position in cm
 terminate_flag = False  # Flag to stop threads
 
+@tracer.traced()
 def move_gantry(new_position):
     """Simulate moving the gantry to a new position."""
     global gantry_position
@@ -31,7 +38,7 @@ def gantry_thread():
         # Wait for 2 seconds before the next movement
         time.sleep(2)
 
-def run_gantry_simulation(duration=10):
+def run_gantry_simulation(duration=10, trace_filename='gantry_trace.json'):
     """Run the gantry movement simulation."""
     global terminate_flag
 
@@ -51,5 +58,9 @@ def run_gantry_simulation(duration=10):
     thread.join()
     print("Gantry simulation complete.")
 
+    # Export spans when tracing is enabled (HZ_TRACE=1)
+    if tracer.enabled:
+        export_chrome_trace(trace_filename)
+
 if __name__ == "__main__":
     run_gantry_simulation(duration=10)  # Run the simulation for 10 seconds
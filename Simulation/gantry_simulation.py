@@ -287,6 +287,11 @@ import pytz
 import json
 import os
 
+# CSV time index lives with the analysis tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Acquisition'))
+from log_index import TimeIndexWriter
+from log_rollup import RollupWriter
+
 # Signal handler for graceful termination
 def signal_handler(signal_received, frame):
     print("Interrupt received! Cleaning up...")
@@ -319,15 +324,24 @@ def read_sensor_data(sensor_file_path):
         print(f"Error reading sensor data: {e}")
         return None
 
-def log_data_to_csv(file, data):
-    """Log data to CSV with precise timestamps."""
+def log_data_to_csv(file, data, index=None):
+    """Log data to CSV with precise timestamps, noting the row's offset in the time index."""
     data = ['N/A' if d is None else d for d in data]
+    if index is not None:
+        index.note_row(data[0], file.tell())
     writer = csv.writer(file)
     writer.writerow(data)
     file.flush()
 
-def run_gantry_simulation(duration=10, sensor_csv='/app/logs/sensor_log.csv', image_csv='/app/logs/image_log.csv'):
-    """Run the gantry system and log sensor data and image data in real-time."""
+def run_gantry_simulation(duration=10, sensor_csv='/app/logs/sensor_log.csv', image_csv='/app/logs/image_log.csv',
+                          sensor_source=None, image_source=None):
+    """Run the gantry system and log sensor data and image data in real-time.
+
+    With a sensor_source (e.g. log_replay.LogReplaySource) ticks come from a recorded log on its
+    own timeline instead of the JSON sensor files, until the log ends or `duration` (None = no
+    limit) runs out. An image_source supplies the recorded image file names. Recorded logs must
+    have the same columns as the logs written here; anything else raises ValueError.
+    """
     print(f"Writing sensor data to: {sensor_csv}")
     print(f"Writing image data to: {image_csv}")
     
@@ -343,6 +357,22 @@ def run_gantry_simulation(duration=10, sensor_csv='/app/logs/sensor_log.csv', im
         '/app/logs/mlx90614_sensor.json'
     ]
 
+    sensor_header = [
+        "Timestamp",
+        "DHT22_1_Temperature", "DHT22_1_Humidity",
+        "DHT22_2_Temperature", "DHT22_2_Humidity",
+        "BH1750_1_Lux", "BH1750_2_Lux",
+        "Ambient Temp", "Object Temp",
+        "Soil Moisture",
+        "Ultrasound Distance"
+    ]
+    image_header = ["Timestamp", "Image File"]
+
+    # Replayed rows are written under these headers, so refuse logs laid out differently
+    for source, header in ((sensor_source, sensor_header), (image_source, image_header)):
+        if source is not None and source.header != header:
+            raise ValueError(f"{source.filename} columns {source.header} do not match {header}")
+
     # Open the CSV files for writing
     with open(sensor_csv, mode='w', newline='', buffering=1) as sensor_file, \
          open(image_csv, mode='w', newline='', buffering=1) as image_file:
@@ -351,52 +381,62 @@ def run_gantry_simulation(duration=10, sensor_csv='/app/logs/sensor_log.csv', im
         sensor_writer = csv.writer(sensor_file)
         image_writer = csv.writer(image_file)
 
+        # Sidecar time indexes (<log>.idx) for fast range queries
+        sensor_index = TimeIndexWriter(sensor_csv)
+        image_index = TimeIndexWriter(image_csv)
+
         # Write headers for sensor data
-        sensor_writer.writerow([
-            "Timestamp",
-            "DHT22_1_Temperature", "DHT22_1_Humidity",
-            "DHT22_2_Temperature", "DHT22_2_Humidity",
-            "BH1750_1_Lux", "BH1750_2_Lux",
-            "Ambient Temp", "Object Temp",
-            "Soil Moisture",
-            "Ultrasound Distance"
-        ])
+        sensor_writer.writerow(sensor_header)
         print("Sensor CSV headers written.")
 
+        # 1 min / 15 min / 1 h rollups maintained alongside the raw sensor log
+        sensor_rollups = RollupWriter(sensor_csv, sensor_header[1:])
+
         # Write headers for image data
-        image_writer.writerow([
-            "Timestamp",
-            "Image File"
-        ])
+        image_writer.writerow(image_header)
         print("Image CSV headers written.")
 
         # Continuously collect and log data
-        while time.time() - start_time < duration:
-            timestamp = get_formatted_timestamp()
-            sensor_data = []
-
-            # Read data from each sensor file
-            for file_path in sensor_files:
-                data = read_sensor_data(file_path)
-                if data:
-                    sensor_data.extend(data.values())
-                else:
-                    sensor_data.extend([None] * len(data.values()))
+        while duration is None or time.time() - start_time < duration:
+            if sensor_source is not None:
+                # Recorded tick, released on the replay timeline
+                replayed = sensor_source.next_row()
+                if replayed is None:
+                    break
+                timestamp, sensor_data = replayed
+            else:
+                timestamp = get_formatted_timestamp()
+                sensor_data = []
+
+                # Read data from each sensor file
+                for file_path in sensor_files:
+                    data = read_sensor_data(file_path)
+                    if data:
+                        sensor_data.extend(data.values())
+                    else:
+                        sensor_data.extend([None] * len(data.values()))
 
             # Log data if all sensor data is available
             if sensor_data:
                 sensor_data_row = [timestamp] + sensor_data
-                log_data_to_csv(sensor_file, sensor_data_row)
+                log_data_to_csv(sensor_file, sensor_data_row, sensor_index)
+                sensor_rollups.add_row(sensor_data_row)
                 print(f"Logged sensor data at {timestamp}")
 
-                # Simulate image capture
-                image_file_name = f"image_{image_counter:04d}.jpg"
+                # Simulate image capture, or take the recorded image name when replaying
+                image_row = image_source.next_row() if image_source is not None else None
+                image_file_name = image_row[1][0] if image_row else f"image_{image_counter:04d}.jpg"
                 image_data_row = [timestamp, image_file_name]
-                log_data_to_csv(image_file, image_data_row)
+                log_data_to_csv(image_file, image_data_row, image_index)
                 print(f"Logged image data at {timestamp}")
                 image_counter += 1
 
-            time.sleep(0.5)  # Adjust interval as needed
+            if sensor_source is None:
+                time.sleep(0.5)  # Adjust interval as needed
+
+        sensor_index.close()
+        image_index.close()
+        sensor_rollups.close()
 
 if __name__ == "__main__":
     try:
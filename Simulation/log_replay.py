@@ -0,0 +1,212 @@
+import os
+import re
+import sys
+import csv
+import time
+import argparse
+
+# Timestamp parsing and the sensor_data.csv acquisition code live with the analysis tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Acquisition'))
+from log_index import parse_timestamp
+
+'''
+ Replay recorded logs through the pipeline at 1x, Nx or maximum speed.
+
+LogReplaySource reads a recorded CSV log and releases its rows as (timestamp, values) via
+next_row(). Adapters feed those rows into the code that produced each kind of log:
+
+- sensor_log.csv / image_log.csv (gantry simulation): pass the sources straight to
+  run_gantry_simulation(sensor_source=..., image_source=...).
+- Synchronization / Unified Pipeline logs (sensor values followed by '<sensor> Age' columns):
+  ReplaySensorArray stands in for sensor_array, e.g.
+  log_sensor_data_to_csv(..., sensors=ReplaySensorArray(source)).
+- sensor_data.csv (sensor_data_to_CSV.py: epoch timestamps, Sensor_N columns):
+  SensorDataReplay stands in for the serial ports in acquire_sensor_data(source=...).
+
+Rows are released on the original timeline divided by `speed` (None = as fast as possible).
+Gantry logs only have minute-resolution timestamps, so rows that share a timestamp are spaced
+`tie_gap` seconds apart (default: the 0.5 s gantry tick) rather than released in one burst.
+Whenever the consumer asks for a row later than it was due, the difference is recorded as lag,
+and report() shows how far the rest of the pipeline fell behind and its sustained throughput.
+'''
+
+MISSING_VALUES = ('', 'N/A', 'No Data')
+GANTRY_TICK = 0.5  # Seconds between gantry_simulation ticks
+
+
+def _parse_value(value):
+    """Logged field as int/float where numeric, None where missing, otherwise the raw text."""
+    if value in MISSING_VALUES:
+        return None
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            continue
+    return value
+
+
+def is_sensor_data_header(header):
+    """True for the sensor_data.csv layout written by sensor_data_to_CSV.py."""
+    return (len(header) > 1 and header[0] == 'Timestamp'
+            and all(re.fullmatch(r'Sensor_\d+', column) for column in header[1:]))
+
+
+class LogReplaySource:
+    """Release the rows of a recorded CSV log on their original (scaled) timeline."""
+
+    def __init__(self, filename, speed=1.0, tie_gap=GANTRY_TICK):
+        self.filename = filename
+        self.speed = speed or None  # None or 0 -> maximum speed
+        self.tie_gap = tie_gap  # Spacing of rows that share a timestamp
+        self._file = open(filename, newline='')
+        self._reader = csv.reader(self._file)
+        self.header = next(self._reader)
+
+        self.rows = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.last_lag = 0.0
+        self._first_timestamp = None
+        self._position = 0.0  # Seconds into the replay timeline of the last row
+        self._start_wall = None
+        self._end_wall = None
+
+    def next_row(self, raw=False):
+        """Wait until the next row is due and return (timestamp, values); None at end of log.
+
+        Values are parsed to numbers (None where missing) unless `raw` is set.
+        """
+        for row in self._reader:
+            if row:
+                break
+        else:
+            self._end_wall = self._end_wall or time.perf_counter()
+            return None
+
+        timestamp = parse_timestamp(row[0])
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+            self._start_wall = time.perf_counter()
+        else:
+            # Ties (and rows a long run of ties has spilled past) follow the previous row by tie_gap
+            recorded = timestamp - self._first_timestamp
+            self._position = recorded if recorded > self._position else self._position + self.tie_gap
+
+        if self.speed is not None:
+            due = self._start_wall + self._position / self.speed
+            now = time.perf_counter()
+            if now < due:
+                time.sleep(due - now)
+                self.last_lag = 0.0
+            else:
+                self.last_lag = now - due
+                self.total_lag += self.last_lag
+                self.max_lag = max(self.max_lag, self.last_lag)
+
+        self.rows += 1
+        return row[0], (row[1:] if raw else [_parse_value(value) for value in row[1:]])
+
+    def report(self):
+        """Print throughput and how far the consumer fell behind the recorded timeline."""
+        if self._start_wall is None:
+            print(f"{self.filename}: nothing replayed")
+            return
+        elapsed = (self._end_wall or time.perf_counter()) - self._start_wall
+        speed = "max" if self.speed is None else f"{self.speed:g}x"
+        print(f"{self.filename}: replayed {self.rows} rows ({self._position:.1f} s recorded) "
+              f"in {elapsed:.2f} s at {speed} speed, {self.rows / max(elapsed, 1e-9):.1f} rows/s")
+        if self.speed is not None:
+            print(f"Lag behind recorded timeline: max {self.max_lag:.3f} s, "
+                  f"mean {self.total_lag / self.rows:.3f} s, last {self.last_lag:.3f} s")
+
+    def close(self):
+        """Close the recorded log."""
+        self._file.close()
+
+
+class ReplaySensorArray:
+    """A recorded Synchronization / Unified Pipeline log as a drop-in for SensorArray.
+
+    read() returns (values, ages) laid out by header(), like SensorArray.read(), or None at the
+    end of the log. Columns after the age columns (e.g. Image File) are ignored.
+    """
+
+    def __init__(self, source):
+        columns = source.header[1:]
+        self._ages = [i for i, column in enumerate(columns) if column.endswith(' Age')]
+        if not self._ages:
+            raise ValueError(f"{source.filename} has no '<sensor> Age' columns")
+        self._values = list(range(self._ages[0]))
+        self._header = [columns[i] for i in self._values + self._ages]
+        self._channels = [columns[i][:-len(' Age')] for i in self._ages]
+        self._last_ages = [None] * len(self._ages)
+        self.source = source
+
+    def header(self):
+        """Value column names followed by one '<sensor> Age' column per channel."""
+        return list(self._header)
+
+    def read(self):
+        """The next recorded (values, ages), released on the replay timeline."""
+        row = self.source.next_row()
+        if row is None:
+            return None
+        values = row[1]
+        self._last_ages = [values[i] for i in self._ages]
+        return [values[i] for i in self._values], list(self._last_ages)
+
+    def health(self):
+        """Map of channel name -> healthy flag; a channel that never read (no age) is unhealthy."""
+        return {name: age is not None for name, age in zip(self._channels, self._last_ages)}
+
+    def stop(self):
+        """Nothing runs in the background during a replay."""
+
+
+class SensorDataReplay:
+    """A recorded sensor_data.csv as a stand-in for the serial ports of sensor_data_to_CSV.py."""
+
+    def __init__(self, source):
+        if not is_sensor_data_header(source.header):
+            raise ValueError(f"{source.filename} is not a sensor_data.csv log (Timestamp, Sensor_N, ...)")
+        self.source = source
+
+    def read_sensor_data(self):
+        """One reading per sensor as logged (same shape as read_sensor_data()); None at end of log."""
+        row = self.source.next_row(raw=True)
+        return None if row is None else row[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded sensor log through the code that wrote it.")
+    parser.add_argument("sensor_log", help="Recorded sensor_log.csv (gantry simulation) or sensor_data.csv")
+    parser.add_argument("--image-log", help="Recorded image_log.csv to replay alongside a gantry log")
+    parser.add_argument("--speed", default="1", help="Replay speed factor, or 'max'")
+    parser.add_argument("--tie-gap", type=float, default=GANTRY_TICK,
+                        help="Seconds between rows that share a timestamp")
+    parser.add_argument("--out-dir", default=".", help="Where the replayed logs are written")
+    args = parser.parse_args()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    sensor_source = LogReplaySource(args.sensor_log, speed, args.tie_gap)
+    image_source = None
+    try:
+        if is_sensor_data_header(sensor_source.header):
+            if args.image_log:
+                parser.error("--image-log only applies to gantry logs")
+            from sensor_data_to_CSV import acquire_sensor_data
+            acquire_sensor_data(duration=None, source=SensorDataReplay(sensor_source),
+                                filename=os.path.join(args.out_dir, 'replay_sensor_data.csv'))
+        else:
+            from gantry_simulation import run_gantry_simulation
+            image_source = LogReplaySource(args.image_log, None) if args.image_log else None
+            run_gantry_simulation(duration=None,
+                                  sensor_csv=os.path.join(args.out_dir, 'replay_sensor_log.csv'),
+                                  image_csv=os.path.join(args.out_dir, 'replay_image_log.csv'),
+                                  sensor_source=sensor_source, image_source=image_source)
+    finally:
+        sensor_source.report()
+        sensor_source.close()
+        if image_source is not None:
+            image_source.close()
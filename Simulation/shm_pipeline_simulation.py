@@ -0,0 +1,114 @@
+import csv
+import time
+import random
+import multiprocessing as mp
+from shm_ring_buffer import SharedRingBuffer
+
+'''
+ Multi-process acquisition pipeline over a shared-memory ring buffer.
+
+The acquisition process publishes every sensor tick once; fusion, logger and dashboard run in
+their own processes and read the ticks in place, each at its own pace. The dashboard is
+deliberately slow and only looks at the newest tick, and the sampler never waits for it.
+'''
+
+# One sensor tick: timestamp, temperature (°C), humidity (%), light (lux), gantry position (cm)
+TICK_FORMAT = '<ddddd'
+TICK_FIELDS = ["Timestamp", "Temperature", "Humidity", "Light Intensity", "Gantry Position"]
+
+
+def acquisition_process(ring_name, stop_event, sample_period=0.01):
+    """Sample the (simulated) sensors and publish each tick to the ring buffer."""
+    ring = SharedRingBuffer.attach(ring_name, TICK_FORMAT)
+    gantry_position = 0.0
+    published = 0
+    while not stop_event.is_set():
+        gantry_position = min(100.0, max(0.0, gantry_position + random.uniform(-1, 1)))
+        ring.publish(time.time(),
+                     random.uniform(20, 25),     # Temperature in °C
+                     random.uniform(50, 60),     # Humidity in %
+                     random.uniform(300, 500),   # Light intensity in lux
+                     gantry_position)
+        published += 1
+        time.sleep(sample_period)
+    print(f"Acquisition: published {published} ticks")
+    ring.close()
+
+
+def fusion_process(ring_name, stop_event):
+    """Fuse every tick (same average as sensor_fusion_simulation)."""
+    ring = SharedRingBuffer.attach(ring_name, TICK_FORMAT)
+    reader = ring.reader()
+    fused = 0
+    fused_value = 0.0
+    while not stop_event.is_set():
+        tick = reader.read()
+        if tick is None:
+            time.sleep(0.001)
+            continue
+        _, temperature, humidity, light_intensity, _ = tick
+        fused_value = (temperature + humidity + light_intensity) / 3
+        fused += 1
+    print(f"Fusion: fused {fused} ticks, last value {fused_value:.2f}, dropped {reader.dropped}")
+    ring.close()
+
+
+def logger_process(ring_name, stop_event, filename='shm_sensor_log.csv'):
+    """Write every tick to CSV in batches."""
+    ring = SharedRingBuffer.attach(ring_name, TICK_FORMAT)
+    reader = ring.reader()
+    logged = 0
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(TICK_FIELDS)
+        while not stop_event.is_set():
+            ticks = reader.read_all(limit=500)
+            writer.writerows(ticks)
+            logged += len(ticks)
+            time.sleep(0.1)  # Flush in batches rather than per tick
+        ticks = reader.read_all()
+        writer.writerows(ticks)
+        logged += len(ticks)
+    print(f"Logger: wrote {logged} ticks to {filename}, dropped {reader.dropped}")
+    ring.close()
+
+
+def dashboard_process(ring_name, stop_event, refresh_period=1.0):
+    """Slow consumer: show only the newest tick once per refresh."""
+    ring = SharedRingBuffer.attach(ring_name, TICK_FORMAT)
+    reader = ring.reader(from_latest=True)
+    while not stop_event.is_set():
+        tick = reader.latest()
+        if tick is not None:
+            _, temperature, humidity, light_intensity, gantry_position = tick
+            print(f"Dashboard: {temperature:.2f}°C, {humidity:.2f}%, {light_intensity:.2f} lux, "
+                  f"gantry at {gantry_position:.1f} cm")
+        time.sleep(refresh_period)
+    ring.close()
+
+
+def run_shm_pipeline(duration=10, capacity=4096):
+    """Run acquisition and consumers as separate processes for `duration` seconds."""
+    ring = SharedRingBuffer.create(TICK_FORMAT, capacity)
+    stop_event = mp.Event()
+    processes = [
+        mp.Process(target=acquisition_process, args=(ring.name, stop_event), name="acquisition"),
+        mp.Process(target=fusion_process, args=(ring.name, stop_event), name="fusion"),
+        mp.Process(target=logger_process, args=(ring.name, stop_event), name="logger"),
+        mp.Process(target=dashboard_process, args=(ring.name, stop_event), name="dashboard"),
+    ]
+    try:
+        for process in processes:
+            process.start()
+        time.sleep(duration)
+    finally:
+        # Signal the processes to stop and wait for them to finish
+        stop_event.set()
+        for process in processes:
+            process.join()
+        ring.close()
+        print("Shared-memory pipeline simulation complete.")
+
+
+if __name__ == "__main__":
+    run_shm_pipeline(duration=10)
@@ -0,0 +1,150 @@
+import struct
+from multiprocessing import shared_memory
+
+'''
+ Lock-free single-producer / multi-consumer ring buffer on shared memory.
+
+The simulations used to share state through module globals and threads, so fusion, logging
+and plotting all ran in the same GIL-bound process as acquisition. With this buffer the
+acquisition process publishes each sensor tick once into a `multiprocessing.shared_memory`
+block, and any number of consumer processes read it in place, each with its own cursor.
+
+Layout (all fields little-endian, 8-byte aligned):
+
+    header: write_count (uint64), capacity (uint64), record_size (uint64)
+    slots:  capacity x [sequence (uint64), record (fixed-size struct, padded to 8 bytes)]
+
+The producer never waits for consumers. Each slot carries a seqlock-style sequence: odd while
+the record is being written, 2 * (index + 1) once complete. A consumer that falls more than
+`capacity` records behind skips ahead to the oldest record still in the buffer and counts
+the skipped ones as dropped, so a slow consumer can never stall the sampler.
+'''
+
+_HEADER = struct.Struct('<QQQ')
+_SEQUENCE = struct.Struct('<Q')
+
+
+def _padded(size):
+    """Round a record size up to the next multiple of 8 bytes."""
+    return (size + 7) & ~7
+
+
+class SharedRingBuffer:
+    """Fixed-size typed records in shared memory; create() once, attach() in each process."""
+
+    def __init__(self, shm, record_format, owner):
+        self.shm = shm
+        self.name = shm.name
+        self.record = struct.Struct(record_format)
+        self.record_format = record_format
+        self._owner = owner
+        self._buf = shm.buf
+        _, self.capacity, record_size = _HEADER.unpack_from(self._buf, 0)
+        if record_size != self.record.size:
+            raise ValueError(f"Record format {record_format!r} does not match buffer {self.name}")
+        self._slot_size = _SEQUENCE.size + _padded(self.record.size)
+        self._write_count = self.write_count()
+
+    @classmethod
+    def create(cls, record_format, capacity=4096, name=None):
+        """Allocate a new ring buffer (producer side)."""
+        record = struct.Struct(record_format)
+        slot_size = _SEQUENCE.size + _padded(record.size)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + capacity * slot_size)
+        _HEADER.pack_into(shm.buf, 0, 0, capacity, record.size)
+        return cls(shm, record_format, owner=True)
+
+    @classmethod
+    def attach(cls, name, record_format):
+        """Open an existing ring buffer by name (consumer side).
+
+        Attach from processes started by the creator (multiprocessing.Process): they share its
+        resource tracker, so the block is freed exactly once, when the creator closes it.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, record_format, owner=False)
+
+    def _slot_offset(self, index):
+        return _HEADER.size + (index % self.capacity) * self._slot_size
+
+    def write_count(self):
+        """Total records published so far."""
+        return _SEQUENCE.unpack_from(self._buf, 0)[0]
+
+    def publish(self, *values):
+        """Append one record, overwriting the oldest when full. Producer only; never blocks."""
+        index = self._write_count
+        offset = self._slot_offset(index)
+        _SEQUENCE.pack_into(self._buf, offset, 2 * index + 1)  # Writing
+        self.record.pack_into(self._buf, offset + _SEQUENCE.size, *values)
+        _SEQUENCE.pack_into(self._buf, offset, 2 * index + 2)  # Complete
+        self._write_count = index + 1
+        _SEQUENCE.pack_into(self._buf, 0, self._write_count)
+
+    def reader(self, from_latest=False):
+        """A new consumer cursor, starting at the oldest record (or only new ones)."""
+        return RingReader(self, from_latest)
+
+    def close(self):
+        """Detach from the block; the producer also frees it."""
+        self._buf = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    """One consumer's cursor into a SharedRingBuffer."""
+
+    def __init__(self, ring, from_latest=False):
+        self.ring = ring
+        self.dropped = 0
+        write_count = ring.write_count()
+        self.cursor = write_count if from_latest else max(0, write_count - ring.capacity)
+
+    def read(self):
+        """Return the next record as a tuple, or None if the consumer is caught up."""
+        ring = self.ring
+        while True:
+            write_count = ring.write_count()
+            if self.cursor >= write_count:
+                return None
+            oldest = write_count - ring.capacity
+            if self.cursor < oldest:
+                # Lapped by the producer: skip to the oldest record still in the buffer
+                self.dropped += oldest - self.cursor
+                self.cursor = oldest
+
+            offset = ring._slot_offset(self.cursor)
+            expected = 2 * self.cursor + 2
+            if _SEQUENCE.unpack_from(ring._buf, offset)[0] != expected:
+                continue  # Being overwritten right now; re-check how far behind we are
+            values = ring.record.unpack_from(ring._buf, offset + _SEQUENCE.size)
+            if _SEQUENCE.unpack_from(ring._buf, offset)[0] != expected:
+                continue  # Overwritten while reading; discard the torn record
+            self.cursor += 1
+            return values
+
+    def read_all(self, limit=None):
+        """Drain available records (up to `limit`) into a list."""
+        records = []
+        while limit is None or len(records) < limit:
+            record = self.read()
+            if record is None:
+                break
+            records.append(record)
+        return records
+
+    def latest(self):
+        """Skip everything but the newest record (for dashboards); None if nothing published."""
+        write_count = self.ring.write_count()
+        if write_count == 0:
+            return None
+        if self.cursor < write_count - 1:
+            self.dropped += write_count - 1 - self.cursor
+            self.cursor = write_count - 1
+        return self.read()
+
+    def lag(self):
+        """Records published but not yet read by this consumer."""
+        return max(0, self.ring.write_count() - self.cursor)